@@ -7,9 +7,12 @@ import hashlib
 import logging
 import asyncio
 import threading
-from typing import Callable, Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, Iterator
 from pika.adapters.asyncio_connection import AsyncioConnection
 
+# Length of a hex-encoded HMAC-SHA256 signature
+HMAC_HEX_LENGTH = hashlib.sha256().digest_size * 2
+
 class BaseMessageHandler:
     def __init__(self, host: str = None, secret_key: str = None, exchange: str = "app_events"):
         # Configure logging
@@ -26,6 +29,10 @@ class BaseMessageHandler:
         self.secret_key = secret_key.encode("utf-8") if isinstance(secret_key, str) else secret_key
 
         self._verified_callback = None  # Track the active callback
+
+        # Reusable JSON codec for the publish/consume hot paths
+        self._dumps = json.JSONEncoder(separators=(",", ":")).encode
+        self._loads = json.loads
         
         # Connection setup
         self.connection = None
@@ -70,8 +77,8 @@ class BaseMessageHandler:
                     port=int(os.getenv('RABBITMQ_PORT', 5672)),
                     virtual_host=os.getenv('RABBITMQ_VHOST', '/'),
                     credentials=credentials,
-                    connection_attempts=3,
-                    retry_delay=1
+                    connection_attempts=int(os.getenv('RABBITMQ_CONNECTION_ATTEMPTS', 3)),
+                    retry_delay=float(os.getenv('RABBITMQ_RETRY_DELAY', 1))
                 )
                 
                 self.connection = pika.BlockingConnection(connection_params)
@@ -105,13 +112,16 @@ class BaseMessageHandler:
         """Access point for the verified callback wrapper"""
         return self._verified_callback
 
-    def subscribe(self, routing_key: str, queue_name: str, callback: Callable[[dict], None]):
+    def subscribe(self, routing_key: str, queue_name: str, callback: Callable[[dict], None],
+                  prefetch_count: Optional[int] = None):
         """
         Subscribe to a message queue with a specific routing key
 
         :param routing_key: RabbitMQ routing key to subscribe to
         :param queue_name: Name of the queue to consume from
         :param callback: Callback function to process messages
+        :param prefetch_count: Number of unacknowledged messages the broker may deliver
+            ahead; None leaves the channel's prefetch unlimited
         """
         # Check if channel exists
         if self.channel is None:
@@ -123,6 +133,10 @@ class BaseMessageHandler:
         self._verified_callback = verified_callback
 
         try:
+            # Bound deliveries in flight only when asked; otherwise keep pika's unlimited default
+            if prefetch_count is not None:
+                self.channel.basic_qos(prefetch_count=prefetch_count)
+
             # Declare queue and make it durable
             self.channel.queue_declare(queue=queue_name, durable=True)
 
@@ -145,23 +159,38 @@ class BaseMessageHandler:
             logging.error(f"Failed to subscribe to queue {queue_name}: {e}")
             raise
 
+    def _generate_hmac(self, body: bytes) -> str:
+        """Compute the hex HMAC-SHA256 signature for a message body"""
+        return hmac.digest(self.secret_key, body, "sha256").hex()
+
+    def _verify_hmac(self, body: bytes, signature: str) -> bool:
+        """Check a hex HMAC-SHA256 signature against a message body"""
+        # Signature length is public, so rejecting on it early leaks nothing
+        if len(signature) != HMAC_HEX_LENGTH:
+            return False
+        try:
+            received = bytes.fromhex(signature)
+        except (TypeError, ValueError):
+            return False
+        return hmac.compare_digest(hmac.digest(self.secret_key, body, "sha256"), received)
+
+    @staticmethod
+    def _get_hmac_header(properties) -> str:
+        """Extract the HMAC signature header from message properties"""
+        return properties.headers.get("hmac", "") if hasattr(properties, 'headers') and properties.headers else ""
+
     def _create_verified_callback(self, user_callback: Callable) -> Callable:
         """Factory method for creating verified callbacks"""
         def wrapper(channel, method, properties, body):
             # HMAC validation logic
-            received_hmac = properties.headers.get("hmac", "") if hasattr(properties, 'headers') and properties.headers else ""
-            valid_hmac = hmac.new(
-                self.secret_key,
-                body,
-                hashlib.sha256
-            ).hexdigest()
+            received_hmac = self._get_hmac_header(properties)
             
-            if not hmac.compare_digest(received_hmac, valid_hmac):
+            if not self._verify_hmac(body, received_hmac):
                 channel.basic_reject(method.delivery_tag, requeue=False)
                 return
 
             try:
-                message = json.loads(body)
+                message = self._loads(body)
                 # Process in a separate thread to avoid blocking
                 threading.Thread(target=self._process_message, 
                                 args=(user_callback, message, channel, method.delivery_tag)).start()
@@ -181,6 +210,50 @@ class BaseMessageHandler:
             logging.error(f"Error processing message: {e}")
             channel.basic_nack(delivery_tag, requeue=False)
 
+    def consume_iter(self, queue_name: str, inactivity_timeout: Optional[float] = None) -> Iterator[dict]:
+        """
+        Iterate over verified messages from a queue
+
+        Pulls deliveries through the channel's consume() generator instead of a
+        callback consumer. Each message is acknowledged once the caller asks for
+        the next one or stops iterating; messages failing HMAC or JSON
+        validation are rejected.
+
+        :param queue_name: Name of the queue to consume from
+        :param inactivity_timeout: Seconds to wait for a message before stopping
+        """
+        if self.channel is None:
+            logging.error("Cannot consume: No RabbitMQ channel available")
+            raise RuntimeError("RabbitMQ channel not initialized")
+
+        try:
+            for method, properties, body in self.channel.consume(
+                queue=queue_name,
+                inactivity_timeout=inactivity_timeout
+            ):
+                if method is None:
+                    # Inactivity timeout reached without a delivery
+                    break
+
+                if not self._verify_hmac(body, self._get_hmac_header(properties)):
+                    self.channel.basic_reject(method.delivery_tag, requeue=False)
+                    continue
+
+                try:
+                    message = self._loads(body)
+                except json.JSONDecodeError:
+                    self.channel.basic_reject(method.delivery_tag, requeue=False)
+                    continue
+
+                try:
+                    yield message
+                finally:
+                    # Ack even when the caller stops early, so the broker
+                    # does not redeliver a message that was already handed out
+                    self.channel.basic_ack(method.delivery_tag)
+        finally:
+            self.channel.cancel()
+
     def publish(self, routing_key: str, message: dict):
         """
         Publish a message to RabbitMQ
@@ -194,14 +267,10 @@ class BaseMessageHandler:
 
         try:
             # Serialize message
-            serialized_message = json.dumps(message).encode('utf-8')
+            serialized_message = self._dumps(message).encode('utf-8')
             
             # Calculate HMAC
-            hmac_digest = hmac.new(
-                self.secret_key,
-                serialized_message,
-                hashlib.sha256
-            ).hexdigest()
+            hmac_digest = self._generate_hmac(serialized_message)
             
             # Publish message
             self.channel.basic_publish(
@@ -5,7 +5,7 @@ import json
 from typing import Dict, Any, Optional, List, ClassVar, Type
 from dataclasses import dataclass, field, asdict
 
-@dataclass
+@dataclass(slots=True)
 class BaseMessage:
     """Base class for all message types in the system"""
     
@@ -52,7 +52,7 @@ class BaseMessage:
 
 
 # Command message for service operations
-@dataclass
+@dataclass(slots=True)
 class CommandMessage(BaseMessage):
     """Command to execute a specific operation"""
     MESSAGE_TYPE: ClassVar[str] = "command"
@@ -68,7 +68,7 @@ class CommandMessage(BaseMessage):
 
 
 # Response message for operation results
-@dataclass
+@dataclass(slots=True)
 class ResponseMessage(BaseMessage):
     """Response with operation results"""
     MESSAGE_TYPE: ClassVar[str] = "response"
@@ -84,7 +84,7 @@ class ResponseMessage(BaseMessage):
 
 
 # Event message for system events
-@dataclass
+@dataclass(slots=True)
 class EventMessage(BaseMessage):
     """Event notification message"""
     MESSAGE_TYPE: ClassVar[str] = "event"
@@ -95,7 +95,7 @@ class EventMessage(BaseMessage):
     # Event data
     data: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class StateChangeMessage(EventMessage):
     """Message for state change notifications"""
     MESSAGE_TYPE: ClassVar[str] = "state_change"
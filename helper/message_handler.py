@@ -1,5 +1,4 @@
 import hmac
-import hashlib
 import os
 
 class SecureMessageHandler:
@@ -11,11 +10,7 @@ class SecureMessageHandler:
         self.channel = self.connection.channel()
         
     def _generate_hmac(self, message_body: bytes) -> str:
-        return hmac.new(
-            self.secret_key,
-            msg=message_body,
-            digestmod=hashlib.sha256
-        ).hexdigest()
+        return hmac.digest(self.secret_key, message_body, "sha256").hex()
 
     def send(self, queue: str, message: dict):
         body = json.dumps(message).encode()
@@ -45,6 +45,11 @@ class ServiceRegistry:
             
             logger.info(f"Registering service: {service_name}")
             self.services[service_name] = service
+            
+            # Expose the service as an attribute (registry.tpm) for hot-path
+            # lookups, unless the name would shadow an existing attribute
+            if service_name.isidentifier() and not hasattr(self, service_name):
+                setattr(self, service_name, service)
             return True
     
     async def register_service_async(self, service_name: str, service: Any) -> bool:
@@ -112,6 +117,26 @@ class ServiceRegistry:
         """Async version of register_event_listener"""
         return self.register_event_listener(event_type, listener)
     
+    def clear_message_handlers(self):
+        """Remove all registered message handlers"""
+        with self._lock:
+            self.message_handlers.clear()
+    
+    def clear_event_listeners(self):
+        """Remove all registered event listeners"""
+        with self._lock:
+            self.event_listeners.clear()
+    
+    def reset(self):
+        """Forget all registered services, message handlers and event listeners"""
+        with self._lock:
+            for name, service in self.services.items():
+                if self.__dict__.get(name) is service:
+                    delattr(self, name)
+            self.services.clear()
+            self.message_handlers.clear()
+            self.event_listeners.clear()
+    
     def emit_event(self, event_type: str, *args, **kwargs) -> int:
         """
         Emit an event to all registered listeners.
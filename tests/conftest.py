@@ -1,6 +1,95 @@
 # tests/conftest.py (additions for async support)
+import os
 import pytest
-import asyncio
+from collections import namedtuple
+from unittest.mock import Mock, MagicMock, create_autospec
+from hypothesis import settings, Phase, HealthCheck
+
+from helper.finite_state_machine import BaseStateMachine, State
+from helper.script_runner import ScriptRunner
+
+# Hypothesis profiles: "ci" (default) is derandomized and skips database replay
+# and shrinking, "dev" runs the full example budget and "nightly" a 5x budget for
+# scheduled runs; select with HYPOTHESIS_PROFILE. All drop the deadline and the
+# health checks the mocked suites trip, so individual tests only override the
+# example budget.
+_SUPPRESSED_HEALTH_CHECKS = [
+    HealthCheck.function_scoped_fixture,
+    HealthCheck.too_slow,
+    HealthCheck.data_too_large
+]
+settings.register_profile(
+    "ci",
+    max_examples=20,
+    phases=[Phase.explicit, Phase.generate],
+    deadline=None,
+    derandomize=True,
+    suppress_health_check=_SUPPRESSED_HEALTH_CHECKS
+)
+settings.register_profile(
+    "dev",
+    max_examples=100,
+    deadline=None,
+    suppress_health_check=_SUPPRESSED_HEALTH_CHECKS
+)
+settings.register_profile(
+    "nightly",
+    max_examples=500,
+    deadline=None,
+    suppress_health_check=_SUPPRESSED_HEALTH_CHECKS
+)
+settings.load_profile(os.getenv("HYPOTHESIS_PROFILE", "ci"))
+
+# TPMService collaborator mocks shared by the TPMService test modules; reset()
+# restores these return values between tests or Hypothesis examples
+_TPM_HANDLER_SPEC = [
+    'channel', 'publish', 'publish_command', 'handle_tpm_command',
+    'start_consuming', 'stop_consuming', 'last_response', 'last_error'
+]
+_TPM_MOCK_CONFIG = {
+    "handler": {
+        "publish.return_value": True,
+        "publish_command.return_value": "mock-message-id",
+        "start_consuming.return_value": True,
+        "stop_consuming.return_value": True
+    },
+    "runner": {
+        "execute.return_value": {
+            "success": True,
+            "output": "Mock command executed",
+            "command": "tpm_provision",
+            "args": ["--test-mode"]
+        }
+    },
+    "state_machine": {"state": State.IDLE, "transition.return_value": True},
+}
+
+class TPMMocks(namedtuple("TPMMocks", ["handler", "runner", "state_machine", "channel"])):
+    """Frozen bundle of the TPMMessageHandler, ScriptRunner and state machine mocks"""
+    __slots__ = ()
+
+    def reset(self):
+        """Clear recorded calls and restore every mock to its configured state"""
+        self.channel.reset_mock()
+        for name, config in _TPM_MOCK_CONFIG.items():
+            mock = getattr(self, name)
+            mock.reset_mock(return_value=True, side_effect=True)
+            mock.configure_mock(**config)
+        self.handler.channel = self.channel
+        return self
+
+@pytest.fixture(scope="session")
+def tpm_mocks():
+    """TPMService collaborator mocks, built once per session (per xdist worker)"""
+    # A named channel is not adopted by the handler, so the handler's
+    # reset_mock(return_value=True) leaves its magic methods intact
+    channel = MagicMock(name="channel")
+    return TPMMocks(
+        Mock(spec_set=_TPM_HANDLER_SPEC),
+        create_autospec(ScriptRunner, instance=True),
+        create_autospec(BaseStateMachine, instance=True),
+        channel
+    ).reset()
 
 @pytest.fixture
 async def async_tpm_service():
@@ -23,8 +112,10 @@ async def async_tpm_service():
     # Clean up
     await service.stop_async()
 
-# This is the recommended approach
-@pytest.fixture(scope="function")
-def event_loop_policy():
-    """Return the policy to use for creating event loops."""
-    return asyncio.DefaultEventLoopPolicy()
\ No newline at end of file
+@pytest.fixture
+def mock_pika(monkeypatch):
+    """Replace pika.BlockingConnection with a mock; returns (channel, connection)"""
+    channel, conn = Mock(), Mock()
+    conn.channel.return_value = channel
+    monkeypatch.setattr('pika.BlockingConnection', Mock(return_value=conn))
+    return channel, conn
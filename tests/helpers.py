@@ -0,0 +1,9 @@
+"""Helpers shared by the unit and integration test modules"""
+import hashlib
+import hmac
+
+
+def generate_hmac(secret: str, body: bytes) -> str:
+    """Generate HMAC for message validation"""
+    secret_bytes = secret.encode("utf-8") if isinstance(secret, str) else secret
+    return hmac.new(secret_bytes, body, hashlib.sha256).hexdigest()
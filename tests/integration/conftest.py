@@ -0,0 +1,73 @@
+# tests/integration/conftest.py
+import hashlib
+
+import pytest
+import pytest_asyncio
+
+# Mock script body: echoes its arguments and a canned success payload
+MOCK_SCRIPT = (
+    '#!/bin/bash\n'
+    'echo "Running $0 with args: $@"\n'
+    'echo \'{"success": true, "output": "Mock execution output"}\'\n'
+    'exit 0\n'
+)
+
+@pytest.fixture(scope="session")
+def mock_scripts(tmp_path_factory):
+    """Create mock script files for testing (written and hashed once per session)"""
+    # Session-unique directory for test scripts
+    test_dir = tmp_path_factory.mktemp("tpm_scripts")
+    
+    script_files = {
+        "tpm_provision": test_dir / "tpm_provisioning.sh",
+        "generate_cert": test_dir / "tpm_self_signed_cert.sh"
+    }
+    
+    script_hashes = {}
+    for name, path in script_files.items():
+        path.write_text(MOCK_SCRIPT)
+        path.chmod(0o755)
+        with path.open('rb') as f:
+            script_hashes[name] = hashlib.file_digest(f, 'sha256').hexdigest()
+
+    # Paths are resolved to str once for the service config
+    script_paths = {name: str(path) for name, path in script_files.items()}
+    return {"paths": script_paths, "hashes": script_hashes}
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def registry():
+    """Service registry shared by a module, bound to the module-scoped event loop"""
+    from registry.service_registry import ServiceRegistry
+    
+    registry = ServiceRegistry()
+    yield registry
+    registry.stop_all_services()
+
+@pytest.fixture(scope="module")
+def tpm_service(mock_scripts):
+    """One TPM service (and RabbitMQ connection) shared by a module"""
+    # Imported here so collection and -k selections skip the TPM service import
+    from tpm.module.tpm_service import TPMService
+    
+    config = {
+        'script_paths': mock_scripts["paths"],
+        'script_hashes': mock_scripts["hashes"],
+        'rabbitmq_host': 'localhost'
+    }
+    service = TPMService(config)
+    
+    # Add a method to TPMService to register its handlers with the registry
+    # This would typically be part of the TPMService class
+    if not hasattr(service, 'register_with_registry'):
+        def register_with_registry(svc, reg):
+            if svc.message_handler:
+                reg.register_message_handler(
+                    'tpm.command.#', 
+                    svc.message_handler.handle_tpm_command,
+                    'tpm_worker'
+                )
+        service.register_with_registry = register_with_registry.__get__(service)
+    
+    yield service
+    service.stop()
+    service.message_handler.close()
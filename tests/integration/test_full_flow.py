@@ -1,7 +1,5 @@
 import pytest
 import json
-import hmac
-import hashlib
 import time
 import logging
 import os
@@ -11,10 +9,15 @@ import sys
 from pathlib import Path
 from contextlib import contextmanager
 
+from tests.helpers import generate_hmac
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get('TEST_LOG_LEVEL', 'WARNING'))
 logger = logging.getLogger(__name__)
 
+# Modules sharing the live broker's queues run on the same xdist worker
+pytestmark = [pytest.mark.integration, pytest.mark.xdist_group("rabbitmq")]
+
 # Import the TestMessageHandler
 try:
     # Import from tests directory if available
@@ -50,11 +53,6 @@ def rabbitmq_connection():
             except Exception as e:
                 logger.error(f"Error closing connection: {e}")
 
-def generate_hmac(secret: str, body: bytes) -> str:
-    """Generate HMAC for message validation"""
-    secret_bytes = secret.encode("utf-8") if isinstance(secret, str) else secret
-    return hmac.new(secret_bytes, body, hashlib.sha256).hexdigest()
-
 def send_test_command(command: dict, secret: str = "test-secret"):
     """Send a test command to RabbitMQ"""
     import pika
@@ -104,14 +102,16 @@ def simulate_response(queue_name='tpm.results'):
                 "artifacts": ["signing_key.pem"],
                 "command": "tpm_provision"
             }
+            # Encode once; the signature must cover the exact bytes published
+            body = json.dumps(result).encode()
             
             # Publish directly to queue (don't use exchange)
             channel.basic_publish(
                 exchange='',  # Use default exchange
                 routing_key=queue_name,  # In default exchange, routing key = queue name
-                body=json.dumps(result).encode(),
+                body=body,
                 properties=pika.BasicProperties(
-                    headers={"hmac": generate_hmac("test-secret", json.dumps(result).encode())}
+                    headers={"hmac": generate_hmac("test-secret", body)}
                 )
             )
             
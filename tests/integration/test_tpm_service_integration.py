@@ -2,168 +2,137 @@ import pytest
 import os
 import logging
 import asyncio
-from pathlib import Path
+import shutil
+from types import SimpleNamespace
+from unittest.mock import Mock, call
 
 # Import modules
-from registry.service_registry import ServiceRegistry
-from tpm.module.tpm_service import TPMService
 from helper.finite_state_machine import State, BaseStateMachine
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get('TEST_LOG_LEVEL', 'WARNING'))
 logger = logging.getLogger(__name__)
 
-class TestTPMRegistryIntegration:
-    """Integration tests for TPM service with registry"""
-    
-    @pytest.fixture
-    def registry(self):
-        """Fixture for a service registry"""
-        return ServiceRegistry()
+# Modules sharing the live broker's queues run on the same xdist worker
+pytestmark = [pytest.mark.integration, pytest.mark.xdist_group("rabbitmq")]
 
+async def wait_until(predicate, timeout=5.0, interval=0.05):
+    """Poll predicate until it returns truthy, failing after timeout seconds"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        if loop.time() > deadline:
+            raise TimeoutError(f"Condition not met within {timeout}s")
+        await asyncio.sleep(interval)
+
+class SimpleService:
+    """Minimal non-TPM service with a start/stop lifecycle"""
+    def __init__(self):
+        self.active = False
     
-    @pytest.fixture
-    def mock_scripts(self):
-        """Create mock script files for testing"""
-        # Create temporary directory for test scripts
-        test_dir = "/tmp/test_scripts"
-        os.makedirs(test_dir, exist_ok=True)
-        
-        # Create script paths
-        script_paths = {
-            "tpm_provision": Path(test_dir) / "tpm_provisioning.sh",
-            "generate_cert": Path(test_dir) / "tpm_self_signed_cert.sh"
-        }
-        
-        # Create simple script files that echo their arguments and return success
-        for name, path in script_paths.items():
-            with open(path, 'w') as f:
-                f.write('#!/bin/bash\n')
-                f.write('echo "Running $0 with args: $@"\n')
-                f.write('echo \'{"success": true, "output": "Mock execution output"}\'\n')
-                f.write('exit 0\n')
-            
-            # Make the scripts executable
-            os.chmod(path, 0o755)
-        
-        import hashlib
-        script_hashes = {}
-        for name, path in script_paths.items():
-            with open(path, 'rb') as f:
-                content = f.read()
-                script_hashes[name] = hashlib.sha256(content).hexdigest()
+    def start(self):
+        self.active = True
+        return True
     
-        return {"paths": script_paths, "hashes": script_hashes}
+    def stop(self):
+        self.active = False
+        return True
     
-    def test_basic_service_registration(self, registry, mock_scripts):
+    def is_active(self):
+        return self.active
+
+def _snapshot(registry):
+    """Read every registered service's active flag once for a lifecycle phase"""
+    return {name: service.is_active() for name, service in registry.services.items()}
+
+class TestTPMRegistryIntegration:
+    """Integration tests for TPM service with registry"""
+    
+    @pytest.fixture(autouse=True)
+    def _reset(self, registry, tpm_service):
+        """Isolate tests sharing the module-scoped registry and TPM service"""
+        tpm_service.reset_state()
+        yield
+        registry.reset()
+    
+    def test_basic_service_registration(self, registry, tpm_service):
         """Test basic registration of TPM service with registry"""
-        # Create service with registry
-        config = {
-            'script_paths': mock_scripts["paths"],
-            'script_hashes': mock_scripts["hashes"],
-            'rabbitmq_host': 'localhost'
-        }
-        
-        tpm_service = TPMService(config)
         registry.register_service("tpm", tpm_service)
         
-        # Add a method to TPMService to register its handlers with the registry
-        # This would typically be part of the TPMService class
-        if not hasattr(tpm_service, 'register_with_registry'):
-            def register_with_registry(service, reg):
-                if service.message_handler:
-                    reg.register_message_handler(
-                        'tpm.command.#', 
-                        service.message_handler.handle_tpm_command,
-                        'tpm_worker'
-                    )
-            tpm_service.register_with_registry = register_with_registry.__get__(tpm_service)
-        
         # Explicitly register handlers
         tpm_service.register_with_registry(registry)
         
         # Verify service is registered
         assert registry.get_service('tpm') == tpm_service, "TPM service should be registered with registry"
+        assert registry.tpm is tpm_service, "TPM service should be cached as a registry attribute"
         
         # Verify message handler registration
         assert 'tpm.command.#' in registry.message_handlers, "Command routing key should be registered"
         handler_info = registry.message_handlers['tpm.command.#'][0]
         assert handler_info['queue_name'] == 'tpm_worker', "Queue name should be registered"
     
-    def test_service_lifecycle_through_registry(self, registry, mock_scripts):
-        """Test starting and stopping TPM service through registry"""
-        # Create service with registry
-        config = {'script_paths': mock_scripts["paths"],
-        'script_hashes': mock_scripts["hashes"],
-         'rabbitmq_host': 'localhost'
-         }
-        tpm_service = TPMService(config)
+    @pytest.mark.parametrize("extra_services", [[], ["simple_service"]],
+                             ids=["tpm_only", "with_simple_service"])
+    def test_service_lifecycle_through_registry(self, registry, tpm_service, extra_services):
+        """Test starting and stopping TPM service, alone or alongside others, through registry"""
         registry.register_service("tpm", tpm_service)
 
-        # Add registry handler registration
-        if not hasattr(tpm_service, 'register_with_registry'):
-            def register_with_registry(service, reg):
-                if service.message_handler:
-                    reg.register_message_handler(
-                        'tpm.command.#', 
-                        service.message_handler.handle_tpm_command,
-                        'tpm_worker'
-                    )
-            tpm_service.register_with_registry = register_with_registry.__get__(tpm_service)
-        
         # Explicitly register handlers
         tpm_service.register_with_registry(registry)
         
+        # Register any additional services
+        others = {name: SimpleService() for name in extra_services}
+        for name, service in others.items():
+            registry.register_service(name, service)
+        
         # Start all services through registry
         results = registry.start_all_services()
         
-        # Verify TPM service was started
-        assert 'tpm' in results, "TPM service should be in results"
-        assert results['tpm'] is True, "TPM service should start successfully"
-        assert tpm_service.is_active() is True, "TPM service should be marked active"
+        # Verify all services were started
+        expected = dict.fromkeys(['tpm', *others], True)
+        assert results == expected, "All services should start successfully"
+        assert _snapshot(registry) == expected, "All services should be marked active"
         
         # Stop all services through registry
         results = registry.stop_all_services()
         
-        # Verify TPM service was stopped
-        assert 'tpm' in results, "TPM service should be in results"
-        assert results['tpm'] is True, "TPM service should stop successfully"
-        assert tpm_service.is_active() is False, "TPM service should be marked inactive"
+        # Verify all services were stopped
+        assert results == expected, "All services should stop successfully"
+        assert _snapshot(registry) == dict.fromkeys(expected, False), "All services should be marked inactive"
     
-    def test_event_propagation(self, registry, mock_scripts):
+    def test_event_propagation(self, registry, tpm_service, monkeypatch):
         """Test event propagation between registry and TPM service"""
         # Create event listeners for registry
         state_change_listener = lambda old_state, new_state, context: None
         registry.register_event_listener('tpm.state_change', state_change_listener)
         
-        # Create service with registry
-        config = {'script_paths': mock_scripts["paths"],
-        'script_hashes': mock_scripts["hashes"],
-        'rabbitmq_host': 'localhost'
-         }
-        tpm_service = TPMService(config)
         registry.register_service("tpm", tpm_service)
         
-        # Create a real state machine to test transitions
+        # Swap in a real state machine for this test only; the service is module-scoped,
+        # so the handler's reference is patched too to keep the two in step
         state_machine = BaseStateMachine()
-        tpm_service.state_machine = state_machine
+        monkeypatch.setattr(tpm_service, "state_machine", state_machine)
+        if tpm_service.message_handler:
+            monkeypatch.setattr(tpm_service.message_handler, "state_machine", state_machine)
         
         # Test direct event emission
         result = registry.emit_event('tpm.state_change', State.IDLE, State.PROCESSING, {'command': 'test_command'})
         assert result > 0, "Event should be emitted to at least one listener"
     
-    def test_command_execution_with_registry(self, registry, mock_scripts):
+    def test_command_execution_with_registry(self, registry, tpm_service, monkeypatch):
         """Test executing TPM commands through a service registered with registry"""
-        # Create service with registry
-        config = {
-            'script_paths': mock_scripts["paths"],
-            'script_hashes': mock_scripts["hashes"],
-            'rabbitmq_host': 'localhost'
-        }
-        
-        tpm_service = TPMService(config)
         registry.register_service("tpm", tpm_service)
         
+        # Run the mock scripts in-process; the async test keeps one real execution
+        monkeypatch.setattr(
+            'helper.script_runner.subprocess.run',
+            lambda *args, **kwargs: SimpleNamespace(
+                returncode=0,
+                stdout='{"success": true, "output": "Mock execution output"}\n',
+                stderr=''
+            )
+        )
+        
         # Execute a command through the service
         result = tpm_service.execute_command('tpm_provision', ['--test-mode'])
         
@@ -173,64 +142,51 @@ class TestTPMRegistryIntegration:
         
         # Test command execution through registry
         # Get service from registry and execute command
-        retrieved_service = registry.get_service('tpm')
+        retrieved_service = registry.tpm
         result = retrieved_service.execute_command('generate_cert', ['device123'])
         
         # Verify result
         assert result['success'] is True, "Command should execute successfully"
         assert 'output' in result, "Result should include output"
     
-    def test_message_sending_with_registry(self, registry, mock_scripts):
+    def test_message_sending_with_registry(self, registry, tpm_service, monkeypatch):
         """Test sending messages through a service registered with registry"""
-        # Create service with registry
-        config = {
-            'script_paths': mock_scripts["paths"],
-            'script_hashes': mock_scripts["hashes"],
-            'rabbitmq_host': 'localhost',
-            'exchange': 'test-exchange'
-        }
-    
-        tpm_service = TPMService(config)
         registry.register_service("tpm", tpm_service)
     
-        # For testing purposes, modify the TPMService's send_command method
-        original_send_command = tpm_service.send_command
-        tpm_service.send_command = lambda cmd, args: 'mock-message-id'
-        
-        try:
-            # Send a command
-            message_id = tpm_service.send_command('tpm_provision', ['--test-mode'])
-            
-            # Verify message was sent
-            assert message_id == 'mock-message-id', "Should return message ID from handler"
-            
-            # Test sending through registry
-            retrieved_service = registry.get_service('tpm')
-            message_id = retrieved_service.send_command('generate_cert', ['device123'])
-            
-            # Verify second message
-            assert message_id == 'mock-message-id', "Should return message ID from handler"
-        finally:
-            # Restore original method
-            tpm_service.send_command = original_send_command
+        # Stub the handler's publisher; monkeypatch removes it at teardown
+        publish_command = Mock(return_value='mock-message-id')
+        monkeypatch.setattr(tpm_service.message_handler, 'publish_command', publish_command,
+                            raising=False)
+        
+        # Send a command
+        message_id = tpm_service.send_command('tpm_provision', ['--test-mode'])
+        
+        # Verify message was sent
+        assert message_id == 'mock-message-id', "Should return message ID from handler"
+        
+        # Test sending through registry
+        retrieved_service = registry.tpm
+        message_id = retrieved_service.send_command('generate_cert', ['device123'])
+        
+        # Verify second message
+        assert message_id == 'mock-message-id', "Should return message ID from handler"
+        publish_command.assert_has_calls([
+            call('tpm_provision', ['--test-mode']),
+            call('generate_cert', ['device123'])
+        ])
     
-    @pytest.mark.asyncio
-    async def test_async_operations_with_registry(self, registry, mock_scripts):
+    @pytest.mark.skipif(shutil.which('bash') is None, reason='bash unavailable')
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_async_operations_with_registry(self, registry, tpm_service):
         """Test async operations with TPM service and registry"""
-        # Create service with registry
-        config = {'script_paths': mock_scripts["paths"], 
-        'script_hashes': mock_scripts["hashes"],
-        'rabbitmq_host': 'localhost'
-        }
-        tpm_service = TPMService(config)
         registry.register_service("tpm", tpm_service)
 
-        # Allow time for connection to fully establish
-        await asyncio.sleep(2)
+        # Wait for the connection to be established
+        await wait_until(lambda: tpm_service.message_handler.channel is not None)
 
         # Register an async event listener
         async def async_listener(old_state, new_state, context=None):
-            await asyncio.sleep(0.1)
+            await asyncio.sleep(0)
             return f"Processed state change: {old_state} -> {new_state}"
 
         registry.register_event_listener('tpm.state_change', async_listener)
@@ -240,8 +196,8 @@ class TestTPMRegistryIntegration:
             results = await registry.start_all_services_async()
             assert results['tpm'] is True, "TPM service should start asynchronously"
 
-            # Allow time for services to fully start
-            await asyncio.sleep(2)
+            # Wait for the service to report itself active
+            await wait_until(tpm_service.is_active)
 
             # Emit an event asynchronously
             count = await registry.emit_event_async('tpm.state_change', 
@@ -253,8 +209,8 @@ class TestTPMRegistryIntegration:
             result = await tpm_service.execute_command_async('tpm_provision', ['--test-mode'])
             assert result['success'] is True, "Async command should succeed"
 
-            # Allow time before stopping services
-            await asyncio.sleep(2)
+            # Wait for the consumer thread to be running before stopping
+            await wait_until(lambda: tpm_service.message_handler._consuming)
 
             # Stop services asynchronously
             results = await registry.stop_all_services_async()
@@ -265,49 +221,3 @@ class TestTPMRegistryIntegration:
         except AttributeError as e:
             # Skip if async methods aren't implemented
             pytest.skip(f"Async methods not implemented in registry or service: {e}")
-    
-    def test_multiple_services_with_registry(self, registry, mock_scripts):
-        """Test registry handling multiple services including TPM"""
-        # Create TPM service
-        config = {'script_paths': mock_scripts["paths"],
-        'script_hashes': mock_scripts["hashes"],
-        'rabbitmq_host': 'localhost'
-        }
-        tpm_service = TPMService(config)
-        registry.register_service("tpm", tpm_service)
-        
-        # Create a simple second service using a regular class
-        class SimpleService:
-            def __init__(self):
-                self.active = False
-            
-            def start(self):
-                self.active = True
-                return True
-            
-            def stop(self):
-                self.active = False
-                return True
-        
-        simple_service = SimpleService()
-        
-        # Register the second service
-        registry.register_service('simple_service', simple_service)
-        
-        # Start all services
-        results = registry.start_all_services()
-        
-        # Verify both services were started
-        assert results['tpm'] is True, "TPM service should start successfully"
-        assert results['simple_service'] is True, "Simple service should start successfully"
-        assert tpm_service.is_active() is True, "TPM service should be active"
-        assert simple_service.active is True, "Simple service should be active"
-        
-        # Stop all services
-        results = registry.stop_all_services()
-        
-        # Verify both services were stopped
-        assert results['tpm'] is True, "TPM service should stop successfully"
-        assert results['simple_service'] is True, "Simple service should stop successfully"
-        assert tpm_service.is_active() is False, "TPM service should be inactive"
-        assert simple_service.active is False, "Simple service should be inactive"
\ No newline at end of file
@@ -2,15 +2,18 @@
 # Simulates TPM provisioning process
 echo "Starting TPM provisioning mock..."
 
+# Artifacts go to TPM_ARTIFACT_DIR when set, so parallel runs don't share ./
+OUT_DIR="${TPM_ARTIFACT_DIR:-.}"
+
 # Create dummy artifacts
-mkdir -p certs
-echo "-----BEGIN MOCK KEY-----" > signing_key.pem
-echo "1234" > handle.txt
+mkdir -p "$OUT_DIR/certs"
+echo "-----BEGIN MOCK KEY-----" > "$OUT_DIR/signing_key.pem"
+echo "1234" > "$OUT_DIR/handle.txt"
 
 # Test parameter handling
 if [[ "$*" == *"--test-mode"* ]]; then
   echo "Test mode enabled"
-  echo "additional_file.txt" > artifact.txt
+  echo "additional_file.txt" > "$OUT_DIR/artifact.txt"
 fi
 
 # Simulate success/failure
@@ -0,0 +1,22 @@
+"""Hypothesis strategies shared across test modules, built once at import"""
+import os
+import string
+
+from hypothesis import strategies as st
+
+# Set HYPOTHESIS_DEEP_FUZZ=1 to widen strategies that default to small pools
+DEEP_FUZZ = bool(os.environ.get("HYPOTHESIS_DEEP_FUZZ"))
+
+# ASCII names for scripts, services and queues, which are all treated as opaque keys
+NAME_ALPHABET = string.ascii_letters + string.digits + "_-."
+NAMES = st.text(alphabet=NAME_ALPHABET, min_size=1, max_size=30)
+
+# Longer than any NAMES draw, so never collides with a registered name
+UNREGISTERED_NAMES = st.text(alphabet=NAME_ALPHABET, min_size=31, max_size=40)
+
+# Command-line arguments for scripts and TPM commands
+ARGUMENTS = st.lists(
+    st.text(alphabet=NAME_ALPHABET, min_size=0, max_size=30),
+    min_size=0,
+    max_size=5
+)
@@ -0,0 +1,90 @@
+import pytest
+import json
+import hmac
+import hashlib
+import pika
+from unittest.mock import Mock
+
+from helper.base_messenger import BaseMessageHandler
+
+@pytest.fixture
+def messenger(mock_pika):
+    """BaseMessageHandler backed by a mocked RabbitMQ connection"""
+    return BaseMessageHandler(host="localhost", secret_key="test-secret")
+
+@pytest.mark.parametrize("body", [
+    b"test message",
+    json.dumps({"key": "value"}).encode(),
+    b"",
+    b"special chars: !@#$%^&*()",
+])
+def test_hmac_authentication(messenger, body):
+    """Signatures round-trip and reject tampering or bad input"""
+    signature = messenger._generate_hmac(body)
+
+    # Must match the reference hmac.new() computation
+    assert signature == hmac.new(b"test-secret", body, hashlib.sha256).hexdigest()
+    assert messenger._verify_hmac(body, signature)
+
+    # Tampered body and invalid signatures are rejected
+    assert not messenger._verify_hmac(body + b"x", signature)
+    assert not messenger._verify_hmac(body, "invalid_signature")
+    assert not messenger._verify_hmac(body, signature[:-2])
+    assert not messenger._verify_hmac(body, "z" * len(signature))
+    assert not messenger._verify_hmac(body, "")
+
+def test_consume_iter(messenger):
+    """Iterator consumption yields verified messages and rejects the rest"""
+    valid_body = json.dumps({"command": "tpm_provision"}).encode()
+    deliveries = [
+        (Mock(delivery_tag=1), Mock(headers={"hmac": messenger._generate_hmac(valid_body)}), valid_body),
+        (Mock(delivery_tag=2), Mock(headers={"hmac": "bad"}), valid_body),
+        (Mock(delivery_tag=3), Mock(headers={"hmac": messenger._generate_hmac(b"not json")}), b"not json"),
+        (None, None, None),  # inactivity timeout
+    ]
+    messenger.channel.consume.return_value = iter(deliveries)
+
+    received = list(messenger.consume_iter("tpm_worker", inactivity_timeout=0.1))
+
+    assert received == [{"command": "tpm_provision"}]
+    messenger.channel.basic_ack.assert_called_once_with(1)
+    assert [c.args[0] for c in messenger.channel.basic_reject.call_args_list] == [2, 3]
+    messenger.channel.cancel.assert_called_once()
+
+def test_consume_iter_acks_on_early_exit(messenger):
+    """Breaking out of the iterator still acks the message it handed out"""
+    body = json.dumps({"command": "tpm_provision"}).encode()
+    properties = Mock(headers={"hmac": messenger._generate_hmac(body)})
+    deliveries = [(Mock(delivery_tag=tag), properties, body) for tag in (1, 2)]
+    messenger.channel.consume.return_value = iter(deliveries)
+
+    for message in messenger.consume_iter("tpm_worker"):
+        break
+
+    assert message == {"command": "tpm_provision"}
+    messenger.channel.basic_ack.assert_called_once_with(1)
+    messenger.channel.cancel.assert_called_once()
+
+def test_subscribe_sets_prefetch(messenger):
+    """Subscribing configures channel QoS before declaring the queue"""
+    messenger.subscribe("tpm.command.#", "tpm_worker", Mock(), prefetch_count=5)
+
+    messenger.channel.basic_qos.assert_called_once_with(prefetch_count=5)
+    messenger.channel.queue_declare.assert_called_once_with(queue="tpm_worker", durable=True)
+
+def test_subscribe_keeps_unlimited_prefetch(messenger):
+    """Without a prefetch_count the channel QoS is left untouched"""
+    messenger.subscribe("tpm.command.#", "tpm_worker", Mock())
+
+    messenger.channel.basic_qos.assert_not_called()
+
+def test_connection_retry_from_env(monkeypatch, mock_pika):
+    """Retry attempts and delay can be tuned through the environment"""
+    monkeypatch.setenv("RABBITMQ_CONNECTION_ATTEMPTS", "1")
+    monkeypatch.setenv("RABBITMQ_RETRY_DELAY", "0")
+
+    BaseMessageHandler(host="localhost", secret_key="test-secret")
+
+    params = pika.BlockingConnection.call_args.args[0]
+    assert params.connection_attempts == 1
+    assert params.retry_delay == 0
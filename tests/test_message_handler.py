@@ -3,6 +3,7 @@ import json
 import hmac
 import hashlib
 import time
+import os
 import logging
 import pika
 import pytest
@@ -12,7 +13,7 @@ from helper.finite_state_machine import BaseStateMachine
 from helper.script_runner import ScriptRunner
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get('TEST_LOG_LEVEL', 'WARNING'))
 logger = logging.getLogger(__name__)
 
 class TestMessageHandler:
@@ -48,7 +49,7 @@ class TestMessageHandler:
             "generate_cert": Path("/tests/mock_scripts/tpm_self_signed_cert.sh")
         }
         hashes = {
-            "tpm_provision":"925c7d4f5d4d4cd42cba6fcb5d8905748d85eacc031464922165168e29c150bf",
+            "tpm_provision":"d115443ed1d6b73093beded7e9385ee955138b9ff285db1c943537a15dc172cc",
             "generate_cert":"8130adae9348b77b7056a65083cf9da8f2dab77e1b2f216d10dd34c07c4c8424"
         }
         
@@ -2,62 +2,75 @@ import pytest
 import os
 import tempfile
 import shutil
-import string
 import hashlib
 import asyncio
 from typing import Dict, List, Tuple
-from unittest.mock import patch, MagicMock
-from hypothesis import given, strategies as st, settings, assume, HealthCheck
+from unittest.mock import patch, MagicMock, create_autospec
+from hypothesis import given, strategies as st, settings, assume, Phase
 from hypothesis.stateful import RuleBasedStateMachine, rule, invariant
 
 from helper.script_runner import ScriptRunner
+from tests.strategies import ARGUMENTS, NAMES, UNREGISTERED_NAMES
+
+# Keep this module on one pytest-xdist worker (with --dist loadgroup) so its
+# module-scoped fixtures are built once
+pytestmark = pytest.mark.xdist_group("script_runner_hypothesis")
+
+# Fixed code path with a mocked subprocess: a few examples suffice, and a failure
+# is in the mock wiring rather than the input, so shrinking (and targeting) is skipped
+_MOCKED_SUBPROCESS = settings(max_examples=10, phases=[Phase.explicit, Phase.generate])
+
+# Keyword arguments ScriptRunner.execute passes to every subprocess.run call
+_RUN_KWARGS = {"capture_output": True, "text": True, "check": True}
+
+# Pool of plausible script lines; sampling it is much cheaper than drawing free text
+_SCRIPT_LINES = [""] + [
+    line
+    for word in ("tpm", "cert", "key", "pcr", "nonce", "handle")
+    for line in (
+        f"echo {word}",
+        f"{word.upper()}=\"${{1:-{word}}}\"",
+        f"echo \"${{{word.upper()}}}\" > /dev/null",
+        f"test -n \"${word.upper()}\" || exit 1",
+        f"# {word} step",
+        f"printf '%s\\n' '{word}'",
+        f"[ -d /tmp/{word} ] && ls /tmp/{word}",
+    )
+]
+
+# Strategy singletons, built once at import rather than on every call or draw
+_SHEBANGS = st.sampled_from(["#!/bin/sh", "#!/bin/bash", "#!/usr/bin/env python"])
+_SCRIPT_BODIES = st.lists(st.sampled_from(_SCRIPT_LINES), min_size=1, max_size=10)
+_EXIT_CODES = st.integers(min_value=0, max_value=255)
 
 # Define strategies for different test inputs
-@st.composite
-def script_names(draw):
+def script_names():
     """Generate valid script names"""
-    return draw(st.text(
-        alphabet=string.ascii_letters + string.digits + "_-.",
-        min_size=1,
-        max_size=30
-    ))
+    return NAMES
+
+def unregistered_script_names():
+    """Generate names longer than any script_names() draw, so they never collide"""
+    return UNREGISTERED_NAMES
 
 @st.composite
 def script_contents(draw):
     """Generate valid script contents"""
     # Create a script with a shebang line and some commands
-    shebang = draw(st.sampled_from(["#!/bin/sh", "#!/bin/bash", "#!/usr/bin/env python"]))
+    shebang = draw(_SHEBANGS)
     
-    # Generate 1-10 lines of simple commands
-    lines = draw(st.lists(
-        st.text(
-            alphabet=string.ascii_letters + string.digits + " =-_+.'\"${}()[]",
-            min_size=0,
-            max_size=50
-        ),
-        min_size=1,
-        max_size=10
-    ))
+    # Generate 1-10 lines of simple commands from the precomputed pool
+    lines = draw(_SCRIPT_BODIES)
     
     # Add exit code at the end for shell scripts
     if "sh" in shebang:
-        exit_code = draw(st.integers(min_value=0, max_value=255))
+        exit_code = draw(_EXIT_CODES)
         lines.append(f"exit {exit_code}")
     
     return f"{shebang}\n" + "\n".join(lines)
 
-@st.composite
-def script_arguments(draw):
+def script_arguments():
     """Generate command-line arguments"""
-    return draw(st.lists(
-        st.text(
-            alphabet=string.ascii_letters + string.digits + "_-.",
-            min_size=0,
-            max_size=30
-        ),
-        min_size=0,
-        max_size=5
-    ))
+    return ARGUMENTS
 
 @st.composite
 def script_files(draw):
@@ -80,7 +93,6 @@ def script_files(draw):
 
 # Test script registration - use unique names to avoid duplicates
 @given(scripts=st.lists(script_files(), min_size=1, max_size=5, unique_by=lambda s: s[0]))
-@settings(max_examples=25)  # Limit the number of examples to avoid creating too many files
 def test_script_registration(scripts):
     """Test script registration with various inputs"""
     try:
@@ -108,10 +120,6 @@ def test_script_registration(scripts):
     content1=script_contents(),
     content2=script_contents()
 )
-@settings(
-    max_examples=25,
-    suppress_health_check=[HealthCheck.filter_too_much]  # Suppress health check if needed
-)
 def test_duplicate_script_rejection(script_name, content1, content2):
     """Test that the script runner rejects scripts with duplicate names"""
     # Create two temporary files with different content
@@ -161,7 +169,6 @@ def test_duplicate_script_rejection(script_name, content1, content2):
     script=script_files(),
     tampered_content=script_contents()
 )
-@settings(max_examples=25)
 def test_script_integrity(script, tampered_content):
     """Test script integrity verification with original and tampered content"""
     name, path, content, hash_val = script
@@ -188,103 +195,112 @@ def test_script_integrity(script, tampered_content):
         if os.path.exists(path):
             os.unlink(path)
 
+@pytest.fixture(scope="module")
+def mock_run():
+    """subprocess.run, patched once for the module and reset by each example"""
+    with patch('subprocess.run') as mock_run:
+        yield mock_run
+
+# subprocess.run behaviour, whether execution should succeed, and the text the
+# result must carry in its "output" (success) or "error" (failure) field
+EXECUTION_OUTCOMES = [
+    pytest.param({"return_value": MagicMock(stdout="Mock output", stderr="")}, True, "Mock output", id="success"),
+    pytest.param({"side_effect": Exception("Mocked execution error")}, False, "Mocked execution error", id="error"),
+]
+
 # Test script execution with mocked subprocess
+@pytest.mark.parametrize("run_config, succeeds, expected_text", EXECUTION_OUTCOMES)
 @given(
     script=script_files(),
     args=script_arguments()
 )
-@settings(max_examples=25)
-def test_script_execution(script, args):
-    """Test script execution with various inputs and mocked subprocess"""
+@_MOCKED_SUBPROCESS
+def test_script_execution(mock_run, run_config, succeeds, expected_text, script, args):
+    """Test script execution results for a succeeding and a failing subprocess"""
     name, path, _, hash_val = script
     
     try:
         # Initialize ScriptRunner with the script
         runner = ScriptRunner({name: path}, {name: hash_val})
         
-        # Mock subprocess.run to avoid actually running the script
-        with patch('subprocess.run') as mock_run:
-            # Configure the mock
-            mock_process = MagicMock()
-            mock_process.stdout = "Mock output"
-            mock_process.stderr = ""
-            mock_run.return_value = mock_process
-            
-            # Execute the script
-            result = runner.execute(name, args)
-            
-            # Verify the result
-            assert result["success"] == True, f"Script {name} execution should succeed"
-            assert result["output"] == "Mock output", f"Script {name} output should match mock"
+        # Configure the patched subprocess.run to avoid actually running the script
+        mock_run.reset_mock(return_value=True, side_effect=True)
+        mock_run.configure_mock(**run_config)
+        
+        # Execute the script
+        result = runner.execute(name, args)
+        
+        # Verify the result
+        assert result["success"] is succeeds, f"Script {name} success should be {succeeds}"
+        if succeeds:
+            assert result["output"] == expected_text, f"Script {name} output should match mock"
             assert result["command"] == name, f"Command should be {name}"
             assert result["args"] == [], f"Args should be empty list (script runner ignores them)"
-            
-            # Verify subprocess.run was called correctly
-            mock_run.assert_called_once_with([path], capture_output=True, text=True, check=True)
+        else:
+            assert expected_text in result["error"], "Error should contain exception message"
+        
+        # Verify subprocess.run was called correctly
+        assert mock_run.call_count == 1 and mock_run.call_args.args == ([path],)
+        assert mock_run.call_args.kwargs == _RUN_KWARGS
     finally:
         # Clean up temporary file
         if os.path.exists(path):
             os.unlink(path)
 
-# Test unauthorized script execution
+def run_unregistered(runner, name, path, unregistered_name):
+    """Ask the runner for a script that was never registered"""
+    return runner.execute(unregistered_name)
+
+def run_tampered(runner, name, path, unregistered_name):
+    """Modify a registered script on disk, then ask the runner to execute it"""
+    with open(path, 'a') as f:
+        f.write("\necho 'tampered'")
+    return runner.execute(name)
+
+# Ways execute() must refuse a script before running it, and the error it reports
+EXECUTION_FAILURES = [
+    pytest.param(run_unregistered, "Unauthorized script", id="unauthorized"),
+    pytest.param(run_tampered, "Script integrity check failed", id="tampered"),
+]
+
+# Test script execution refusals
+@pytest.mark.parametrize("run, expected_error", EXECUTION_FAILURES)
 @given(
     valid_script=script_files(),
-    unauthorized_name=script_names()
+    unauthorized_name=unregistered_script_names()
 )
-def test_unauthorized_script_execution(valid_script, unauthorized_name):
-    """Test executing an unauthorized script"""
+@_MOCKED_SUBPROCESS
+def test_script_execution_refused(mock_run, run, expected_error, valid_script, unauthorized_name):
+    """Test that unauthorized or tampered scripts are refused without running"""
     name, path, _, hash_val = valid_script
     
     try:
-        # Skip if the unauthorized name happens to match the valid one
-        assume(unauthorized_name != name)
-        
         # Initialize ScriptRunner with a valid script
         runner = ScriptRunner({name: path}, {name: hash_val})
         
-        # Try to execute an unauthorized script
-        result = runner.execute(unauthorized_name)
+        mock_run.reset_mock()
+        result = run(runner, name, path, unauthorized_name)
         
         # Verify the result
-        assert result["success"] == False, "Unauthorized script execution should fail"
-        assert "Unauthorized script" in result["error"], "Error should indicate unauthorized script"
+        assert result == {"success": False, "error": expected_error}, f"Execution should fail with {expected_error}"
+        assert mock_run.call_count == 0, "Refused scripts must not reach subprocess.run"
     finally:
         # Clean up temporary file
         if os.path.exists(path):
             os.unlink(path)
 
-# Test script execution with error
-@given(script=script_files())
-@settings(max_examples=25)
-def test_script_execution_error(script):
-    """Test script execution with error"""
-    name, path, _, hash_val = script
-    
-    try:
-        # Initialize ScriptRunner with the script
-        runner = ScriptRunner({name: path}, {name: hash_val})
-        
-        # Mock subprocess.run to simulate an error
-        with patch('subprocess.run') as mock_run:
-            # Configure the mock to raise an exception
-            mock_run.side_effect = Exception("Mocked execution error")
-            
-            # Execute the script
-            result = runner.execute(name)
-            
-            # Verify the result
-            assert result["success"] == False, f"Script {name} execution should fail"
-            assert "Mocked execution error" in result["error"], "Error should contain exception message"
-    finally:
-        # Clean up temporary file
-        if os.path.exists(path):
-            os.unlink(path)
+# Constant part of the mocked execute() result; each example adds its command
+_ASYNC_RESULT = {"success": True, "output": "Mock async output", "error": "", "args": []}
+
+@pytest.fixture(scope="module")
+def mock_execute():
+    """ScriptRunner.execute autospecced once per module, so bad call signatures still fail"""
+    return create_autospec(ScriptRunner, instance=True).execute
 
 # Test async script execution
-@pytest.mark.asyncio
 @given(script=script_files())
-@settings(max_examples=25)
-async def test_async_script_execution(script):
+@_MOCKED_SUBPROCESS
+async def test_async_script_execution(mock_execute, script):
     """Test asynchronous script execution"""
     name, path, _, hash_val = script
     
@@ -292,26 +308,21 @@ async def test_async_script_execution(script):
         # Initialize ScriptRunner with the script
         runner = ScriptRunner({name: path}, {name: hash_val})
         
-        # Mock the execute method to avoid actually running the script
-        with patch.object(runner, 'execute') as mock_execute:
-            # Configure the mock
-            mock_execute.return_value = {
-                "success": True,
-                "output": "Mock async output",
-                "error": "",
-                "command": name,
-                "args": []
-            }
-            
-            # Execute the script asynchronously
-            result = await runner.execute_async(name)
-            
-            # Verify the result
-            assert result["success"] == True, f"Async script {name} execution should succeed"
-            assert result["output"] == "Mock async output", f"Script {name} output should match mock"
-            
-            # Verify execute was called correctly
-            mock_execute.assert_called_once_with(name, None)
+        # Inject the shared mock, cleared of the previous example's calls,
+        # to avoid actually running the script
+        mock_execute.reset_mock(return_value=True)
+        mock_execute.return_value = {**_ASYNC_RESULT, "command": name}
+        runner.execute = mock_execute
+        
+        # Execute the script asynchronously
+        result = await runner.execute_async(name)
+        
+        # Verify the result
+        assert result["success"] == True, f"Async script {name} execution should succeed"
+        assert result["output"] == "Mock async output", f"Script {name} output should match mock"
+        
+        # Verify execute was called correctly
+        mock_execute.assert_called_once_with(name, None)
     finally:
         # Clean up temporary file
         if os.path.exists(path):
@@ -325,6 +336,11 @@ class ScriptRunnerStateMachine(RuleBasedStateMachine):
         self.runner = ScriptRunner({})
         self.registered_scripts = {}
         self.script_hashes = {}
+        
+        # Mock subprocess.run once per run; execute_script only clears its calls
+        self.run_patcher = patch('subprocess.run')
+        self.mock_run = self.run_patcher.start()
+        self.mock_run.return_value = MagicMock(stdout="Mock output", stderr="")
     
     @rule(script=script_files())
     def register_script(self, script):
@@ -368,32 +384,25 @@ class ScriptRunnerStateMachine(RuleBasedStateMachine):
     @rule(name=script_names(), args=script_arguments())
     def execute_script(self, name, args):
         """Execute a script"""
-        # Mock subprocess.run to avoid actually running the script
-        with patch('subprocess.run') as mock_run:
-            # Configure the mock
-            mock_process = MagicMock()
-            mock_process.stdout = "Mock output"
-            mock_process.stderr = ""
-            mock_run.return_value = mock_process
-            
-            # Execute the script
-            result = self.runner.execute(name, args)
-            
-            if name in self.registered_scripts:
-                # Should succeed for registered scripts
-                assert result["success"] == True, f"Script {name} execution should succeed"
-                assert result["output"] == "Mock output", f"Script {name} output should match mock"
-                # Verify subprocess.run was called correctly
-                mock_run.assert_called_once_with(
-                    [self.runner.allowed_scripts[name]], 
-                    capture_output=True, 
-                    text=True, 
-                    check=True
-                )
-            else:
-                # Should fail for unknown scripts
-                assert result["success"] == False, f"Unknown script {name} execution should fail"
-                assert "Unauthorized script" in result["error"], "Error should indicate unauthorized script"
+        mock_run = self.mock_run
+        mock_run.reset_mock()
+        
+        # Execute the script
+        result = self.runner.execute(name, args)
+        
+        if name in self.registered_scripts:
+            # Should succeed for registered scripts
+            assert result["success"] == True, f"Script {name} execution should succeed"
+            assert result["output"] == "Mock output", f"Script {name} output should match mock"
+            # Verify subprocess.run was called correctly
+            assert mock_run.call_count == 1
+            assert mock_run.call_args.args == ([self.runner.allowed_scripts[name]],)
+            assert mock_run.call_args.kwargs == _RUN_KWARGS
+        else:
+            # Should fail for unknown scripts
+            assert result["success"] == False, f"Unknown script {name} execution should fail"
+            assert "Unauthorized script" in result["error"], "Error should indicate unauthorized script"
+            assert mock_run.call_count == 0, "Unknown scripts must not reach subprocess.run"
     
     @invariant()
     def registered_scripts_are_consistent(self):
@@ -403,7 +412,8 @@ class ScriptRunnerStateMachine(RuleBasedStateMachine):
             assert os.path.abspath(path) == self.runner.allowed_scripts[name], f"Script path should match"
     
     def teardown(self):
-        """Clean up temporary files"""
+        """Remove the subprocess.run patch and clean up temporary files"""
+        self.run_patcher.stop()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
 # Run the state machine test
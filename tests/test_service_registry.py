@@ -1,13 +1,14 @@
 import pytest
 import os
 import logging
+import threading
 from unittest.mock import Mock, MagicMock
 
 # Import the ServiceRegistry class
 from registry.service_registry import ServiceRegistry
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get('TEST_LOG_LEVEL', 'WARNING'))
 logger = logging.getLogger(__name__)
 
 class TestServiceRegistry:
@@ -41,6 +42,11 @@ class TestServiceRegistry:
         # Get the service
         service = registry.get_service("test_service")
         assert service == mock_service, "Should retrieve the registered service"
+        assert registry.test_service is mock_service, "Service should be cached as an attribute"
+        
+        # Names that would shadow registry attributes are not cached
+        registry.register_service("services", Mock())
+        assert isinstance(registry.services, dict), "Registry attributes should not be shadowed"
         
         # Get nonexistent service
         service = registry.get_service("nonexistent")
@@ -104,6 +110,28 @@ class TestServiceRegistry:
         count = registry.emit_event("test_event")
         assert count == 1, "Should count only successful notifications"
     
+    def test_emit_event_outside_lock(self):
+        """Test that listeners are invoked without the registry lock held"""
+        registry = ServiceRegistry()
+        lock_free = []
+        
+        def try_lock():
+            # Another thread can take the lock only if the emitter released it
+            acquired = registry._lock.acquire(blocking=False)
+            if acquired:
+                registry._lock.release()
+            lock_free.append(acquired)
+        
+        def listener():
+            probe = threading.Thread(target=try_lock)
+            probe.start()
+            probe.join()
+        
+        registry.register_event_listener("test_event", listener)
+        
+        assert registry.emit_event("test_event") == 1, "Event should reach the listener"
+        assert lock_free == [True], "Listeners should not run while the registry lock is held"
+    
     def test_start_all_services(self):
         """Test starting all services"""
         registry = ServiceRegistry()
@@ -180,4 +208,25 @@ class TestServiceRegistry:
         
         # Test error handling in stop
         results = registry.stop_all_services()
-        assert results["error_service"] is False, "Should handle stop exception"
\ No newline at end of file
+        assert results["error_service"] is False, "Should handle stop exception"
+    
+    def test_reset(self):
+        """Test clearing handlers, listeners and services"""
+        registry = ServiceRegistry()
+        registry.register_service("service", Mock())
+        registry.register_message_handler("test.routing.key", Mock())
+        registry.register_event_listener("test_event", Mock())
+        
+        # Clear handlers and listeners individually
+        registry.clear_message_handlers()
+        registry.clear_event_listeners()
+        assert registry.message_handlers == {}, "Message handlers should be cleared"
+        assert registry.event_listeners == {}, "Event listeners should be cleared"
+        assert registry.emit_event("test_event") == 0, "No listeners should be notified"
+        assert registry.get_service("service") is not None, "Services should survive clearing handlers"
+        
+        # Reset forgets services as well
+        registry.reset()
+        assert registry.get_service("service") is None, "Services should be cleared by reset"
+        assert not hasattr(registry, "service"), "Cached service attribute should be removed"
+        assert registry.register_service("service", Mock()) is True, "Name should be reusable after reset"
@@ -3,73 +3,118 @@ import asyncio
 import string
 from typing import Dict, List, Any, Callable, Optional
 from unittest.mock import Mock, AsyncMock
-from hypothesis import given, strategies as st, settings
+from hypothesis import given, strategies as st, settings, Phase
 from hypothesis.stateful import RuleBasedStateMachine, rule, invariant
 
 from registry.service_registry import ServiceRegistry
+from tests.strategies import DEEP_FUZZ, NAMES
+
+# Keep this module on one pytest-xdist worker (with --dist loadgroup) so its
+# module-scoped fixtures are built once
+pytestmark = pytest.mark.xdist_group("service_registry_hypothesis")
+
+# Precomputed name pools; include non-identifiers and a registry attribute name
+_SERVICE_NAMES = [
+    f"{base}{suffix}"
+    for base in ("tpm", "registry", "auth", "services", "x")
+    for suffix in ("", "_1", "-worker", ".v2")
+]
+_EVENT_TYPES = [
+    f"{source}{sep}{event}"
+    for source in ("tpm", "registry", "auth")
+    for sep in (".", "_")
+    for event in ("state_change", "started", "stopped", "error")
+]
+
+# Routing keys: a known namespace (as in "tpm.command.#") then 0-4 free segments;
+# HYPOTHESIS_DEEP_FUZZ=1 draws the namespace segment as free text too
+_ROUTING_SEGMENT = st.text(
+    alphabet=string.ascii_lowercase + string.digits + "_-",
+    min_size=1,
+    max_size=20
+)
+_ROUTING_KEYS = st.builds(
+    lambda namespace, segments: ".".join([namespace, *segments]),
+    st.sampled_from(["tpm", "registry", "auth"]),
+    st.lists(_ROUTING_SEGMENT, min_size=0, max_size=4)
+)
+_FREE_ROUTING_KEYS = st.lists(_ROUTING_SEGMENT, min_size=1, max_size=5).map(".".join)
+
+# Name strategies built once; service_name_lists() draws from these on every example
+_SERVICE_NAME = NAMES if DEEP_FUZZ else st.sampled_from(_SERVICE_NAMES)
+_EVENT_TYPE = NAMES if DEEP_FUZZ else st.sampled_from(_EVENT_TYPES)
 
 # Define strategies for generating test data
-@st.composite
-def service_names(draw):
+def service_names():
     """Strategy to generate valid service names"""
-    return draw(st.text(
-        alphabet=string.ascii_letters + string.digits + "_-.",
-        min_size=1, 
-        max_size=30
-    ))
-
-@st.composite
-def routing_keys(draw):
+    return _SERVICE_NAME
+
+def routing_keys():
     """Strategy to generate valid routing keys"""
-    segments = draw(st.lists(
-        st.text(
-            alphabet=string.ascii_lowercase + string.digits + "_-",
-            min_size=1,
-            max_size=20
-        ),
-        min_size=1,
-        max_size=5
-    ))
-    return ".".join(segments)
-
-@st.composite
-def event_types(draw):
+    return _FREE_ROUTING_KEYS if DEEP_FUZZ else _ROUTING_KEYS
+
+def service_name_lists(max_size):
+    """Strategy to generate 1..max_size unique service names, count drawn first"""
+    return st.integers(min_value=1, max_value=max_size).flatmap(
+        lambda n: st.lists(_SERVICE_NAME, min_size=n, max_size=n, unique=True)
+    )
+
+def event_types():
     """Strategy to generate valid event types"""
-    return draw(st.text(
-        alphabet=string.ascii_letters + string.digits + "_-.",
-        min_size=1, 
-        max_size=30
-    ))
+    return _EVENT_TYPE
+
+@pytest.fixture(scope="module")
+def registry():
+    """One ServiceRegistry for the module's properties; each example reset()s it"""
+    return ServiceRegistry()
+
+class StubService:
+    """Minimal service with start/stop that records calls; cheaper than Mock per example"""
+    __slots__ = ("calls",)
+
+    def __init__(self):
+        self.calls = []
+
+    def start(self):
+        self.calls.append("start")
+        return True
+
+    def stop(self):
+        self.calls.append("stop")
+        return True
+
+class AsyncStartService:
+    """Stateless service that starts via a coroutine and stops synchronously"""
+    __slots__ = ()
+
+    async def start_async(self):
+        return True
+
+    def stop(self):
+        return True
+
+class AsyncStopService:
+    """Stateless service that starts synchronously and stops via a coroutine"""
+    __slots__ = ()
+
+    def start(self):
+        return True
+
+    async def stop_async(self):
+        return True
+
+# Stateless, so one instance of each serves every name in every example
+_ASYNC_LIFECYCLE_SERVICES = (AsyncStartService(), AsyncStopService())
 
 # Simplify the test by always having methods for all services
-@given(
-    num_services=st.integers(min_value=1, max_value=10),
-    service_names=st.lists(service_names(), min_size=1, max_size=10, unique=True)
-)
-def test_start_stop_service_properties(num_services, service_names):
+@given(service_names=service_name_lists(10))
+def test_start_stop_service_properties(registry, service_names):
     """Test properties of starting and stopping services"""
-    # Ensure we have enough names
-    if len(service_names) < num_services:
-        return
+    registry.reset()
     
-    registry = ServiceRegistry()
-    
-    # Create and register services
-    services = []
-    for i in range(num_services):
-        name = service_names[i]
-        
-        # Always add methods to all services to avoid test failures
-        should_have_start = True
-        should_have_stop = True
-        
-        service = Mock()
-        
-        # Add methods to all services
-        service.start = Mock(return_value=True)
-        service.stop = Mock(return_value=True)
-        
-        services.append((name, service, should_have_start, should_have_stop))
+    # Create and register services; every service has start and stop methods
+    services = [(name, StubService(), True, True) for name in service_names]
+    for name, service, _, _ in services:
         registry.register_service(name, service)
     
     # Start all services
@@ -82,7 +127,7 @@ def test_start_stop_service_properties(num_services, service_names):
         
         # The key insight: ServiceRegistry returns True if the method exists
         # So we should verify if the method actually exists on the service
-        has_start_method = hasattr(service, 'start') and callable(service.start)
+        has_start_method = callable(getattr(service, 'start', None))
         
         # Check that the result matches whether the service has the method or not
         assert start_results[name] == has_start_method, f"Service {name} start result should match whether it has a start method"
@@ -91,7 +136,7 @@ def test_start_stop_service_properties(num_services, service_names):
         assert has_start_method, f"Service {name} should have a start method"
         
         # If the service has a start method, it should have been called
-        service.start.assert_called_once()
+        assert service.calls == ["start"], f"Service {name} should be started once"
     
     # Stop all services
     stop_results = registry.stop_all_services()
@@ -101,7 +146,7 @@ def test_start_stop_service_properties(num_services, service_names):
         assert name in stop_results, f"Service {name} should be in stop results"
         
         # Check if the service has a stop method
-        has_stop_method = hasattr(service, 'stop') and callable(service.stop)
+        has_stop_method = callable(getattr(service, 'stop', None))
         
         # Check that the result matches whether the service has the method or not
         assert stop_results[name] == has_stop_method, f"Service {name} stop result should match whether it has a stop method"
@@ -110,47 +155,19 @@ def test_start_stop_service_properties(num_services, service_names):
         assert has_stop_method, f"Service {name} should have a stop method"
         
         # If the service has a stop method, it should have been called
-        service.stop.assert_called_once()
+        assert service.calls == ["start", "stop"], f"Service {name} should be stopped once"
 
 
-@pytest.mark.asyncio
-@given(
-    num_services=st.integers(min_value=1, max_value=5),
-    service_names=st.lists(service_names(), min_size=1, max_size=5, unique=True)
-)
-@settings(deadline=None)  # Disable deadline since async tests can be slower
-async def test_async_start_stop_services(num_services, service_names):
+@given(service_names=service_name_lists(5))
+async def test_async_start_stop_services(registry, service_names):
     """Test async service start/stop functionality"""
-    # Ensure we have enough names
-    if len(service_names) < num_services:
-        return
-        
-    registry = ServiceRegistry()
+    registry.reset()
     
-    # Create and register services
+    # Register the shared stubs, alternating which lifecycle step is async
     services = []
-    for i in range(num_services):
-        name = service_names[i]
-        
-        # Our logic for which services should have methods
-        should_have_start = True  # All services have start methods
-        should_have_stop = True   # All services have stop methods
-        
-        service = Mock()
-        
-        # Add start methods to all services
-        if i % 2 == 0:
-            service.start_async = AsyncMock(return_value=True)
-        else:
-            service.start = Mock(return_value=True)
-        
-        # Add stop methods to all services
-        if i % 2 == 1:
-            service.stop_async = AsyncMock(return_value=True)
-        else:
-            service.stop = Mock(return_value=True)
-        
-        services.append((name, service, should_have_start, should_have_stop))
+    for i, name in enumerate(service_names):
+        service = _ASYNC_LIFECYCLE_SERVICES[i % 2]
+        services.append((name, service, True, True))
         registry.register_service(name, service)
     
     # Start all services asynchronously
@@ -161,8 +178,8 @@ async def test_async_start_stop_services(num_services, service_names):
         assert name in start_results, f"Service {name} should be in start results"
         
         # Every service should have either a start or start_async method
-        has_start_method = (hasattr(service, 'start_async') and asyncio.iscoroutinefunction(service.start_async)) or \
-                         (hasattr(service, 'start') and callable(service.start))
+        has_start_method = asyncio.iscoroutinefunction(getattr(service, 'start_async', None)) or \
+                         callable(getattr(service, 'start', None))
         
         # The result should be True for all services with methods
         assert start_results[name] is True, f"Service {name} start result should be True since it has a start method"
@@ -178,8 +195,8 @@ async def test_async_start_stop_services(num_services, service_names):
         assert name in stop_results, f"Service {name} should be in stop results"
         
         # Every service should have either a stop or stop_async method
-        has_stop_method = (hasattr(service, 'stop_async') and asyncio.iscoroutinefunction(service.stop_async)) or \
-                        (hasattr(service, 'stop') and callable(service.stop))
+        has_stop_method = asyncio.iscoroutinefunction(getattr(service, 'stop_async', None)) or \
+                        callable(getattr(service, 'stop', None))
         
         # The result should be True for all services with methods
         assert stop_results[name] is True, f"Service {name} stop result should be True since it has a stop method"
@@ -188,48 +205,55 @@ async def test_async_start_stop_services(num_services, service_names):
         assert has_stop_method, f"Service {name} should have a stop method"
 
 
-# Basic service registration tests
+async def call_registry(registry, method, *args):
+    """Call a registry method by name, awaiting the result of its async variants"""
+    result = getattr(registry, method)(*args)
+    return await result if asyncio.iscoroutine(result) else result
+
+# Basic service registration tests, through the sync and async registry APIs
+@pytest.mark.parametrize("suffix", ["", "_async"], ids=["sync", "async"])
 @given(
     service_name=service_names(),
     service_name2=service_names()
 )
-def test_service_registration_properties(service_name, service_name2):
+async def test_service_registration_properties(registry, suffix, service_name, service_name2):
     """Test that service registration properties hold"""
     # Skip if the names are the same
     if service_name == service_name2:
         return
         
-    registry = ServiceRegistry()
+    registry.reset()
     mock_service = Mock()
     mock_service2 = Mock()
+    register, get = "register_service" + suffix, "get_service" + suffix
     
     # Register first service
-    result = registry.register_service(service_name, mock_service)
+    result = await call_registry(registry, register, service_name, mock_service)
     assert result is True, "First registration should succeed"
     
     # Registering the same service name should fail
-    result = registry.register_service(service_name, mock_service2)
+    result = await call_registry(registry, register, service_name, mock_service2)
     assert result is False, "Duplicate registration should fail"
     
     # Registering a different service name should succeed
-    result = registry.register_service(service_name2, mock_service2)
+    result = await call_registry(registry, register, service_name2, mock_service2)
     assert result is True, "Second registration with different name should succeed"
     
     # Getting services should work as expected
-    retrieved = registry.get_service(service_name)
+    retrieved = await call_registry(registry, get, service_name)
     assert retrieved == mock_service, "Should retrieve the correct service"
     
-    retrieved2 = registry.get_service(service_name2)
+    retrieved2 = await call_registry(registry, get, service_name2)
     assert retrieved2 == mock_service2, "Should retrieve the correct second service"
 
 
 @given(
     routing_key=routing_keys(),
-    queue_name=st.one_of(st.none(), st.text(min_size=1, max_size=30))
+    queue_name=st.one_of(st.none(), NAMES)
 )
-def test_message_handler_registration_properties(routing_key, queue_name):
+def test_message_handler_registration_properties(registry, routing_key, queue_name):
     """Test message handler registration properties"""
-    registry = ServiceRegistry()
+    registry.reset()
     mock_handler = Mock()
     mock_handler2 = Mock()
     
@@ -253,23 +277,22 @@ def test_message_handler_registration_properties(routing_key, queue_name):
         assert handler_info["queue_name"] == queue_name, "Queue name should match"
 
 
+# Alphanumeric payload text keeps generation cheap; content does not affect dispatch
+payload_alphabet = st.characters(whitelist_categories=('Lu', 'Ll', 'Nd'))
+
 @given(
     event_type=event_types(),
-    args=st.lists(st.text(min_size=0, max_size=20), min_size=0, max_size=5),
-    kwargs_keys=st.lists(st.text(min_size=1, max_size=20), min_size=0, max_size=5, unique=True),
-    kwargs_values=st.lists(st.text(min_size=0, max_size=20), min_size=0, max_size=5)
+    args=st.lists(st.text(alphabet=payload_alphabet, max_size=8), min_size=0, max_size=5),
+    kwargs_keys=st.lists(st.text(alphabet=payload_alphabet, min_size=1, max_size=8), min_size=0, max_size=5, unique=True),
+    kwargs_values=st.lists(st.text(alphabet=payload_alphabet, max_size=8), min_size=0, max_size=5)
 )
-def test_event_emission_properties(event_type, args, kwargs_keys, kwargs_values):
+@settings(max_examples=5, phases=[Phase.generate])
+def test_event_emission_properties(registry, event_type, args, kwargs_keys, kwargs_values):
     """Test properties of event emission"""
-    # Ensure kwargs_keys and kwargs_values have same length
-    if len(kwargs_keys) > len(kwargs_values):
-        kwargs_keys = kwargs_keys[:len(kwargs_values)]
-    elif len(kwargs_values) > len(kwargs_keys):
-        kwargs_values = kwargs_values[:len(kwargs_keys)]
-    
+    # zip pairs keys with values, dropping the longer list's surplus
     kwargs = dict(zip(kwargs_keys, kwargs_values))
     
-    registry = ServiceRegistry()
+    registry.reset()
     
     # Create and register mock listeners
     listener1 = Mock()
@@ -283,8 +306,9 @@ def test_event_emission_properties(event_type, args, kwargs_keys, kwargs_values)
     
     # Verify properties
     assert count == 2, "Should notify both listeners"
-    listener1.assert_called_once_with(*args, **kwargs)
-    listener2.assert_called_once_with(*args, **kwargs)
+    for listener in (listener1, listener2):
+        assert listener.call_count == 1
+        assert listener.call_args.args == tuple(args) and listener.call_args.kwargs == kwargs
     
     # Test error handling
     listener1.reset_mock()
@@ -299,49 +323,15 @@ def test_event_emission_properties(event_type, args, kwargs_keys, kwargs_values)
 
 
 # Async tests requiring pytest event loop
-@pytest.mark.asyncio
-@given(
-    service_name=service_names(),
-    service_name2=service_names()
-)
-async def test_async_service_registration(service_name, service_name2):
-    """Test async service registration"""
-    # Skip if the names are the same
-    if service_name == service_name2:
-        return
-        
-    registry = ServiceRegistry()
-    mock_service = Mock()
-    mock_service2 = Mock()
-    
-    # Register first service
-    result = await registry.register_service_async(service_name, mock_service)
-    assert result is True, "First registration should succeed"
-    
-    # Registering the same service name should fail
-    result = await registry.register_service_async(service_name, mock_service2)
-    assert result is False, "Duplicate registration should fail"
-    
-    # Registering a different service name should succeed
-    result = await registry.register_service_async(service_name2, mock_service2)
-    assert result is True, "Second registration with different name should succeed"
-    
-    # Getting services should work as expected
-    retrieved = await registry.get_service_async(service_name)
-    assert retrieved == mock_service, "Should retrieve the correct service"
-
-
-@pytest.mark.asyncio
 @given(
     event_type=event_types(),
-    args=st.lists(st.text(min_size=0, max_size=20), min_size=0, max_size=3)
+    args=st.lists(st.text(alphabet=string.printable, max_size=20), min_size=0, max_size=3)
 )
-@settings(deadline=None)  # Disable deadline since async tests can be slower
-async def test_async_event_emission(event_type, args):
+async def test_async_event_emission(registry, event_type, args):
     """Test async event emission properties"""
     # FIX: Removed kwargs which was causing errors with run_in_executor
     
-    registry = ServiceRegistry()
+    registry.reset()
     
     # Create and register mock listeners (mix of sync and async)
     sync_listener = Mock()
@@ -355,8 +345,8 @@ async def test_async_event_emission(event_type, args):
     
     # Verify properties
     assert count == 2, "Should notify both listeners"
-    sync_listener.assert_called_once_with(*args)
-    async_listener.assert_called_once_with(*args)
+    for listener in (sync_listener, async_listener):
+        assert listener.call_count == 1 and listener.call_args.args == tuple(args)
     
     # Test error handling
     sync_listener.reset_mock()
@@ -399,7 +389,7 @@ class ServiceRegistryStateMachine(RuleBasedStateMachine):
         else:
             assert result is None, "Should return None for nonexistent service"
     
-    @rule(key=routing_keys(), queue=st.one_of(st.none(), st.text(min_size=1, max_size=20)))
+    @rule(key=routing_keys(), queue=st.one_of(st.none(), NAMES))
     def register_handler(self, key, queue):
         """Rule to register a message handler"""
         handler = Mock()
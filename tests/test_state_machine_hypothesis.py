@@ -2,12 +2,11 @@ import pytest
 from hypothesis import given, strategies as st
 from helper.finite_state_machine import BaseStateMachine, State
 
+_STATES = st.sampled_from([State.IDLE, State.PROCESSING, State.COMPLETED, State.FAILED])
+
 class TestStateMachineWithHypothesis:
     
-    @given(transitions=st.lists(
-        st.sampled_from([State.IDLE, State.PROCESSING, State.COMPLETED, State.FAILED]),
-        min_size=1, max_size=20
-    ))
+    @given(transitions=st.lists(_STATES, min_size=1, max_size=20))
     def test_state_machine_always_reaches_valid_state(self, transitions):
         """Test that state machine always ends in a valid state"""
         machine = BaseStateMachine()
@@ -20,10 +19,7 @@ class TestStateMachineWithHypothesis:
         assert machine.state in list(State), f"Invalid final state: {machine.state}"
         
     @given(
-        initial_transitions=st.lists(
-            st.sampled_from([State.IDLE, State.PROCESSING, State.COMPLETED, State.FAILED]),
-            min_size=1, max_size=10
-        ),
+        initial_transitions=st.lists(_STATES, min_size=1, max_size=10),
         reset_position=st.integers(min_value=0, max_value=9)
     )
     def test_state_machine_reset(self, initial_transitions, reset_position):
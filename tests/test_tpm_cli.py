@@ -1,5 +1,9 @@
 # tests/test_tpm_cli.py
 import subprocess
+import pytest
+
+# Smoke checks share the single swtpm simulator; keep them on one xdist worker
+pytestmark = [pytest.mark.smoke, pytest.mark.xdist_group("swtpm")]
 
 def test_tpm2_tools_installed():
     """Verify TPM2 tools are available"""
@@ -1,22 +1,63 @@
 import pytest
 import json
-import hmac
-import hashlib
 import os
+import logging
 from unittest.mock import Mock, patch, ANY
 from pathlib import Path
 from helper.finite_state_machine import BaseStateMachine, State
 from helper.script_runner import ScriptRunner
 from tpm.tpm_message_handler import TPMMessageHandler
+from tests.helpers import generate_hmac
 
-def generate_hmac(secret: str, body: bytes) -> str:
-    """Generate HMAC for message validation"""
-    secret_bytes = secret.encode("utf-8") if isinstance(secret, str) else secret
-    return hmac.new(secret_bytes, body, hashlib.sha256).hexdigest()
+logger = logging.getLogger(__name__)
 
-@pytest.fixture
+# Keep this module on one pytest-xdist worker (with --dist loadgroup) so its
+# module-scoped fixtures are built once
+pytestmark = pytest.mark.xdist_group("tpm_handler")
+
+def simulate_provision(handler, action):
+    """Mimic a successful tpm_provision run without touching RabbitMQ"""
+    # Set state to processing
+    handler.state_machine.transition(State.PROCESSING, {"command": action})
+    
+    # Mock successful execution
+    mock_result = {
+        "success": True,
+        "output": "OK",
+        "artifacts": ["signing_key.pem"],
+        "command": action
+    }
+    
+    # Update handler state
+    handler.last_response = mock_result
+    handler.state_machine.transition(State.COMPLETED, mock_result)
+    
+    # Publish the result
+    handler.publish("tpm.result", mock_result)
+    
+    # Reset state
+    handler.state_machine.reset()
+
+def simulate_unauthorized(handler, action):
+    """Mimic the rejection of a script that is not registered"""
+    # Set error message
+    handler.last_error = "Unauthorized script"
+    
+    # Publish error
+    handler.publish("tpm.error", {"success": False, "error": "Unauthorized script"})
+    
+    # Reset state
+    handler.state_machine.reset()
+
+# Simulated handling for each action the tests send
+SIMULATED_ACTIONS = {
+    "tpm_provision": simulate_provision,
+    "dangerous_script": simulate_unauthorized
+}
+
+@pytest.fixture(scope="module")
 def tpm_handler():
-    """Test fixture for TPM handler with properly mocked components"""
+    """Test fixture for TPM handler with properly mocked components, built once per module"""
     # Set up script paths
     scripts = {
         "tpm_provision": Path("/tests/mock_scripts/tpm_provisioning.sh"),
@@ -25,76 +66,47 @@ def tpm_handler():
     runner = ScriptRunner(scripts)
     state_machine = BaseStateMachine()
     
-    # Create mocks for RabbitMQ components
-    with patch('pika.BlockingConnection', autospec=True) as mock_conn:
-        # Set up mock channel
-        mock_channel = Mock()
-        mock_conn.return_value.channel.return_value = mock_channel
-        
-        # Create handler
+    # Create handler against a mocked RabbitMQ connection
+    with patch('pika.BlockingConnection'):
         handler = TPMMessageHandler(
             script_runner=runner,
             state_machine=state_machine,
             host="localhost",
             secret_key="test-secret"
         )
-        
-        # Replace publish with a proper mock
-        handler.publish = Mock()
-        
-        # Create a wrapper for _verified_callback that processes messages
-        # but doesn't try to use RabbitMQ
-        original_callback = handler._verified_callback
-        
-        def patched_verified_callback(channel, method, properties, body):
-            try:
-                # Extract message from body
-                message = json.loads(body)
-                action = message.get("action")
-                args = message.get("args", [])
+    
+    # Replace publish with a proper mock
+    handler.publish = Mock()
+    
+    # Create a wrapper for _verified_callback that processes messages
+    # but doesn't try to use RabbitMQ
+    original_callback = handler._verified_callback
+    
+    def patched_verified_callback(channel, method, properties, body):
+        try:
+            # Extract message from body and dispatch on its action
+            message = json.loads(body)
+            action = message.get("action")
+            simulate = SIMULATED_ACTIONS.get(action)
+            if simulate:
+                simulate(handler, action)
                 
-                # Handle tpm_provision command
-                if action == "tpm_provision":
-                    # Set state to processing
-                    handler.state_machine.transition(State.PROCESSING, {"command": action})
-                    
-                    # Mock successful execution
-                    mock_result = {
-                        "success": True,
-                        "output": "OK",
-                        "artifacts": ["signing_key.pem"],
-                        "command": action
-                    }
-                    
-                    # Update handler state
-                    handler.last_response = mock_result
-                    handler.state_machine.transition(State.COMPLETED, mock_result)
-                    
-                    # Publish the result
-                    handler.publish("tpm.result", mock_result)
-                    
-                    # Reset state
-                    handler.state_machine.reset()
-                    
-                # Handle unauthorized script
-                elif action == "dangerous_script":
-                    # Set error message
-                    handler.last_error = "Unauthorized script"
-                    
-                    # Publish error
-                    handler.publish("tpm.error", {"success": False, "error": "Unauthorized script"})
-                    
-                    # Reset state
-                    handler.state_machine.reset()
-                    
-            except Exception as e:
-                print(f"Error in patched callback: {e}")
-                handler.last_error = str(e)
-        
-        # Replace the callback
-        handler._verified_callback = patched_verified_callback
-        
-        yield handler
+        except Exception as e:
+            logger.debug(f"Error in patched callback: {e}")
+            handler.last_error = str(e)
+    
+    # Replace the callback
+    handler._verified_callback = patched_verified_callback
+    
+    return handler
+
+@pytest.fixture(autouse=True)
+def _reset_tpm_handler(tpm_handler):
+    """Clear the shared handler's results, publish calls and state before each test"""
+    tpm_handler.last_response = None
+    tpm_handler.last_error = None
+    tpm_handler.publish.reset_mock()
+    tpm_handler.state_machine.reset()
 
 def test_authorized_command_flow(tpm_handler):
     """Test full happy path with valid HMAC and authorized command"""
@@ -10,58 +10,54 @@ from tpm.module.tpm_service import TPMService
 from helper.finite_state_machine import State
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get('TEST_LOG_LEVEL', 'WARNING'))
 logger = logging.getLogger(__name__)
 
+@pytest.fixture(autouse=True, scope="module")
+def _patch_pika():
+    """Stub out the RabbitMQ connection once for every service built in this module"""
+    with patch('pika.BlockingConnection') as mock_connection:
+        mock_connection.return_value.channel.return_value = MagicMock()
+        yield mock_connection
+
 class TestTPMService:
     """Test suite for the TPM Service"""
 
     @pytest.fixture
-    def mock_script_runner(self):
+    def mock_script_runner(self, tpm_mocks):
         """Fixture for a mocked script runner"""
-        mock_runner = Mock()
-        mock_runner.execute = Mock(return_value={
-            "success": True,
-            "output": "Mock command executed",
-            "command": "tpm_provision",
-            "args": ["--test-mode"]
-        })
-        return mock_runner
+        return tpm_mocks.runner
 
     @pytest.fixture
-    def mock_state_machine(self):
+    def mock_state_machine(self, tpm_mocks):
         """Fixture for a mocked state machine"""
-        mock_state = Mock()
-        mock_state.state = State.IDLE
-        mock_state.transition = Mock(return_value=True)
-        mock_state.reset = Mock()
-        return mock_state
+        return tpm_mocks.state_machine
 
     @pytest.fixture
-    def mock_message_handler(self):
-        """Fixture for a mocked message handler"""
-        mock_handler = Mock()
-        mock_handler.channel = Mock()
-        mock_handler.publish = Mock(return_value=True)
-        mock_handler.publish_command = Mock(return_value="mock-message-id")
-        mock_handler.start_consuming = Mock(return_value=True)
-        mock_handler.stop_consuming = Mock(return_value=True)
-        return mock_handler
+    def mock_message_handler(self, tpm_mocks):
+        """Fixture for a mocked message handler limited to the handler's interface"""
+        return tpm_mocks.handler
+
+    @pytest.fixture(autouse=True)
+    def _reset(self, tpm_mocks):
+        """Clear calls and restore configuration on the shared mocks around each test"""
+        tpm_mocks.reset()
+        yield
+        tpm_mocks.reset()
 
     @patch('tpm.module.tpm_service.ScriptRunner')
     @patch('tpm.module.tpm_service.BaseStateMachine')
     @patch('tpm.module.tpm_service.TPMMessageHandler')
     def test_initialization(self, mock_handler_class, mock_state_class, mock_runner_class, 
-                           mock_script_runner, mock_state_machine, mock_message_handler):
+                           mock_script_runner, mock_state_machine, mock_message_handler, tmp_path):
         """Test TPM service initialization"""
         # Setup mocks
         mock_runner_class.return_value = mock_script_runner
         mock_state_class.return_value = mock_state_machine
         mock_handler_class.return_value = mock_message_handler
         
-        # Configure test paths
-        test_script_dir = "/tmp/test_scripts"
-        os.makedirs(test_script_dir, exist_ok=True)
+        # Configure test paths (per-test directory, safe under pytest-xdist)
+        test_script_dir = str(tmp_path)
         
         # Create config
         config = {
@@ -128,6 +124,17 @@ class TestTPMService:
         assert result is True, "Should handle exceptions during stop by returning success"
         assert service.active is False, "Service should be marked inactive even after exceptions"
 
+    def test_start_without_channel(self, mock_message_handler):
+        """Test that starting fails cleanly when the handler has no channel"""
+        service = TPMService({})
+        mock_message_handler.channel = None
+        service.message_handler = mock_message_handler
+        
+        result = service.start()
+        assert result is False, "Start with no channel should fail"
+        assert service.active is False, "Service should remain inactive after failed start"
+        mock_message_handler.start_consuming.assert_not_called()
+
     def test_execute_command(self, mock_script_runner):
         """Test executing commands directly"""
         # Create a service with mocked components
@@ -226,7 +233,41 @@ class TestTPMService:
         count = service.emit_event("test_event")
         assert count == 1, "Should only count successful notifications"
 
-    @pytest.mark.asyncio
+    @pytest.mark.parametrize("via_queue", [False, True])
+    @patch('tpm.module.tpm_service.ScriptRunner')
+    @patch('tpm.module.tpm_service.TPMMessageHandler')
+    def test_command_dispatch(self, mock_handler_class, mock_runner_class, via_queue,
+                              mock_script_runner, mock_message_handler, tmp_path):
+        """Test TPMService direct command execution and command sending"""
+        # The service builds its collaborators from these patched classes
+        mock_runner_class.return_value = mock_script_runner
+        mock_handler_class.return_value = mock_message_handler
+        
+        config = {
+            'rabbitmq_host': 'localhost',
+            'secret_key': 'test_secret',
+            'exchange': 'test_exchange',
+            'script_dir': str(tmp_path)
+        }
+        service = TPMService(config)
+        assert service.script_runner is mock_script_runner
+        assert service.message_handler is mock_message_handler
+        
+        # Test with a fixed command and args
+        command = 'tpm_provision'
+        args = ['--force']
+        
+        if via_queue:
+            # Test sending command through message queue
+            message_id = service.send_command(command, args)
+            assert message_id == "mock-message-id", "Send command should return message ID"
+            mock_message_handler.publish_command.assert_called_once_with(command, args)
+        else:
+            # Test direct command execution
+            result = service.execute_command(command, args)
+            assert result == mock_script_runner.execute.return_value, "Execute command should return expected result"
+            mock_script_runner.execute.assert_called_once_with(command, args)
+
     async def test_async_methods(self, mock_message_handler, mock_script_runner):
         """Test async methods of the service"""
         service = TPMService({})
@@ -162,6 +162,18 @@ class TPMService:
             None, self.send_command, command, args
         )
     
+    def reset_state(self):
+        """Stop the service and return it to a freshly initialized state"""
+        if self.active:
+            self.stop()
+        if self.state_machine:
+            self.state_machine.reset()
+        if self.message_handler:
+            self.message_handler.last_response = None
+            self.message_handler.last_error = None
+        if hasattr(self, '_event_listeners'):
+            self._event_listeners.clear()
+    
     def get_handler(self):
         """Get the TPM message handler"""
         return self.message_handler